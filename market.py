@@ -1,38 +1,53 @@
+import asyncio
 import datetime
+import itertools
 import logging.config
 from environs import Env
 from seller import download_stock
 
+import aiohttp
+import numpy as np
+import pandas as pd
 import requests
-
-from seller import divide, price_conversion
+from seller import (
+    _DIGITS_RE,
+    divide,
+    make_session,
+    request_with_retry,
+)
 
 logger = logging.getLogger(__file__)
 
+# Максимальные размеры партий по документации API Яндекс.Маркета
+YANDEX_STOCKS_BATCH = 2000
+YANDEX_PRICES_BATCH = 500
+
 
-def get_product_list(page, campaign_id, access_token):
+async def get_product_list(page, campaign_id, access_token, session):
     """Получает список товаров кампании на Яндекс.Маркете.
-    
-    Выполняет запрос к API Яндекс.Маркета для получения товаров с пагинацией.
-    Используется для получения всех товаров, размещенных в кампании продавца.
-    
+
+    Выполняет асинхронный запрос к API Яндекс.Маркета для получения товаров
+    с пагинацией. Используется для получения всех товаров, размещенных
+    в кампании продавца.
+
     Args:
         page (str): Токен страницы для пагинации. Для первой страницы - пустая строка.
         campaign_id (str): Идентификатор кампании (кабинета продавца).
         access_token (str): Токен доступа к API Яндекс.Маркета.
-    
+        session (aiohttp.ClientSession): Сессия для выполнения HTTP-запросов.
+
     Returns:
         dict: Словарь с результатами запроса, содержащий:
             - offerMappingEntries: список товаров
             - paging: информация для пагинации
-    
+
     Examples:
-        >>> get_product_list("", "campaign123", "token123")
+        >>> asyncio.run(get_product_list("", "campaign123", "token123", session))
         {'offerMappingEntries': [...], 'paging': {'nextPageToken': 'next123'}}
-        
-        >>> get_product_list("invalid_token", "campaign123", "token123")
+
+        >>> asyncio.run(get_product_list("invalid_token", "campaign123", "token123", session))
         Traceback (most recent call last):
-        requests.exceptions.HTTPError: 400 Client Error
+        aiohttp.ClientResponseError: 400 Client Error
     """
     endpoint_url = "https://api.partner.market.yandex.ru/"
     headers = {
@@ -46,35 +61,40 @@ def get_product_list(page, campaign_id, access_token):
         "limit": 200,
     }
     url = endpoint_url + f"campaigns/{campaign_id}/offer-mapping-entries"
-    response = requests.get(url, headers=headers, params=payload)
-    response.raise_for_status()
-    response_object = response.json()
+    response_object = await request_with_retry(
+        session, "GET", url, headers=headers, params=payload
+    )
     return response_object.get("result")
 
 
-def update_stocks(stocks, campaign_id, access_token):
+async def update_stocks(stocks, campaign_id, access_token, session=None):
     """Обновляет информацию об остатках товаров на Яндекс.Маркете.
-    
-    Отправляет запрос к API Яндекс.Маркета для обновления количества
-    доступных товаров на указанном складе.
-    
+
+    Отправляет асинхронный запрос к API Яндекс.Маркета для обновления
+    количества доступных товаров на указанном складе.
+
     Args:
         stocks (list): Список словарей с данными об остатках.
             Каждый словарь должен содержать ключи: sku, warehouseId, items.
         campaign_id (str): Идентификатор кампании (кабинета продавца).
         access_token (str): Токен доступа к API Яндекс.Маркета.
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+            Если не передана, создается на время вызова.
+
     Returns:
         dict: Ответ от API Яндекс.Маркета с результатом обновления.
-    
+
     Examples:
         >>> stocks = [{'sku': '123', 'warehouseId': '456', 'items': [...]}]
-        >>> update_stocks(stocks, "campaign123", "token123")
+        >>> asyncio.run(update_stocks(stocks, "campaign123", "token123"))
         {'status': 'OK'}
-        
-        >>> update_stocks([], "campaign123", "token123")
+
+        >>> asyncio.run(update_stocks([], "campaign123", "token123"))
         {'status': 'OK'}
     """
+    if session is None:
+        async with make_session() as session:
+            return await update_stocks(stocks, campaign_id, access_token, session)
     endpoint_url = "https://api.partner.market.yandex.ru/"
     headers = {
         "Content-Type": "application/json",
@@ -84,36 +104,41 @@ def update_stocks(stocks, campaign_id, access_token):
     }
     payload = {"skus": stocks}
     url = endpoint_url + f"campaigns/{campaign_id}/offers/stocks"
-    response = requests.put(url, headers=headers, json=payload)
-    response.raise_for_status()
-    response_object = response.json()
+    response_object = await request_with_retry(
+        session, "PUT", url, headers=headers, json=payload
+    )
     return response_object
 
 
-def update_price(prices, campaign_id, access_token):
+async def update_price(prices, campaign_id, access_token, session=None):
     """Обновляет цены товаров на Яндекс.Маркете.
-    
-    Отправляет запрос к API Яндекс.Маркета для обновления цен
-    у указанных товаров.
-    
+
+    Отправляет асинхронный запрос к API Яндекс.Маркета для обновления
+    цен у указанных товаров.
+
     Args:
         prices (list): Список словарей с данными для обновления цен.
             Каждый словарь должен содержать ключи: id, price.
         campaign_id (str): Идентификатор кампании (кабинета продавца).
         access_token (str): Токен доступа к API Яндекс.Маркета.
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+            Если не передана, создается на время вызова.
+
     Returns:
         dict: Ответ от API Яндекс.Маркета с результатом обновления.
-    
+
     Examples:
         >>> prices = [{'id': '123', 'price': {'value': 5990, 'currencyId': 'RUR'}}]
-        >>> update_price(prices, "campaign123", "token123")
+        >>> asyncio.run(update_price(prices, "campaign123", "token123"))
         {'status': 'OK'}
-        
-        >>> update_price([{'id': '123', 'price': {}}], "campaign123", "token123")
+
+        >>> asyncio.run(update_price([{'id': '123', 'price': {}}], "campaign123", "token123"))
         Traceback (most recent call last):
-        requests.exceptions.HTTPError: 400 Client Error
+        aiohttp.ClientResponseError: 400 Client Error
     """
+    if session is None:
+        async with make_session() as session:
+            return await update_price(prices, campaign_id, access_token, session)
     endpoint_url = "https://api.partner.market.yandex.ru/"
     headers = {
         "Content-Type": "application/json",
@@ -123,44 +148,63 @@ def update_price(prices, campaign_id, access_token):
     }
     payload = {"offers": prices}
     url = endpoint_url + f"campaigns/{campaign_id}/offer-prices/updates"
-    response = requests.post(url, headers=headers, json=payload)
-    response.raise_for_status()
-    response_object = response.json()
+    response_object = await request_with_retry(
+        session, "POST", url, headers=headers, json=payload
+    )
     return response_object
 
 
-def get_offer_ids(campaign_id, market_token):
+_offer_ids_cache = {}
+
+
+async def get_offer_ids(campaign_id, market_token, session=None):
     """Получает артикулы товаров Яндекс.Маркета.
-    
+
     Использует пагинацию для получения всех товаров кампании,
-    затем извлекает их артикулы (shopSku).
-    
+    затем извлекает их артикулы (shopSku). Как только из ответа
+    прочитан nextPageToken, следующая страница запрашивается в фоне,
+    пока обрабатывается текущая (опережение в одну страницу).
+    Результат запоминается на время работы процесса, поэтому повторные
+    вызовы для той же кампании не обходят пагинацию заново.
+
     Args:
         campaign_id (str): Идентификатор кампании (кабинета продавца).
         market_token (str): Токен доступа к API Яндекс.Маркета.
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+            Если не передана, создается на время вызова.
+
     Returns:
         list: Список строковых артикулов (shopSku) всех товаров кампании.
-    
+
     Examples:
-        >>> get_offer_ids("campaign123", "token123")
+        >>> asyncio.run(get_offer_ids("campaign123", "token123"))
         ['12345', '67890', '11223']
-        
-        >>> get_offer_ids("invalid_campaign", "token123")
+
+        >>> asyncio.run(get_offer_ids("invalid_campaign", "token123"))
         Traceback (most recent call last):
-        requests.exceptions.HTTPError: 404 Client Error
+        aiohttp.ClientResponseError: 404 Client Error
     """
-    page = ""
+    cached = _offer_ids_cache.get((campaign_id, market_token))
+    if cached is not None:
+        return list(cached)
+    if session is None:
+        async with make_session() as session:
+            return await get_offer_ids(campaign_id, market_token, session)
     product_list = []
+    some_prod = await get_product_list("", campaign_id, market_token, session)
     while True:
-        some_prod = get_product_list(page, campaign_id, market_token)
-        product_list.extend(some_prod.get("offerMappingEntries"))
         page = some_prod.get("paging").get("nextPageToken")
-        if not page:
+        next_page = None
+        if page:
+            next_page = asyncio.create_task(
+                get_product_list(page, campaign_id, market_token, session)
+            )
+        product_list.extend(some_prod.get("offerMappingEntries"))
+        if next_page is None:
             break
-    offer_ids = []
-    for product in product_list:
-        offer_ids.append(product.get("offer").get("shopSku"))
+        some_prod = await next_page
+    offer_ids = [product.get("offer").get("shopSku") for product in product_list]
+    _offer_ids_cache[(campaign_id, market_token)] = tuple(offer_ids)
     return offer_ids
 
 
@@ -169,67 +213,82 @@ def create_stocks(watch_remnants, offer_ids, warehouse_id):
     
     Формирует структуру данных для API Яндекс.Маркета, сопоставляя товары
     из файла поставщика с товарами, размещенными на маркетплейсе.
-    
+    Остатки считаются векторно по столбцам таблицы, без обхода строк
+    в цикле Python.
+
     Args:
-        watch_remnants (list): Список словарей с данными от поставщика.
+        watch_remnants (pandas.DataFrame | list): Данные от поставщика:
+            таблица или список словарей со столбцами 'Код' и 'Количество'.
         offer_ids (list): Список артикулов товаров, размещенных на Яндекс.Маркете.
         warehouse_id (str): Идентификатор склада (FBS или DBS).
     
     Returns:
-        list: Список словарей в формате API Яндекс.Маркета для обновления остатков.
+        tuple: Кортеж из двух списков в формате API Яндекс.Маркета:
+            - stocks: остатки по всем артикулам, включая нулевые
+            - not_empty: только позиции с ненулевым остатком
     
     Examples:
         >>> watch_data = [{'Код': '123', 'Количество': '5'}]
         >>> offer_ids = ['123', '456']
         >>> create_stocks(watch_data, offer_ids, 'warehouse123')
-        [{'sku': '123', 'warehouseId': 'warehouse123', 'items': [...]}, 
-         {'sku': '456', 'warehouseId': 'warehouse123', 'items': [...]}]
+        ([{'sku': '123', ...}, {'sku': '456', ...}], [{'sku': '123', ...}])
         
         >>> create_stocks([], ['123'], 'warehouse123')
-        [{'sku': '123', 'warehouseId': 'warehouse123', 'items': [...]}]
+        ([{'sku': '123', 'warehouseId': 'warehouse123', 'items': [...]}], [])
     """
     # Уберем то, что не загружено в market
-    stocks = list()
+    offer_set = set(offer_ids)
     date = str(datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z")
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            count = str(watch.get("Количество"))
-            if count == ">10":
-                stock = 100
-            elif count == "1":
-                stock = 0
-            else:
-                stock = int(watch.get("Количество"))
-            stocks.append(
+    df = (
+        watch_remnants
+        if isinstance(watch_remnants, pd.DataFrame)
+        else pd.DataFrame(watch_remnants)
+    )
+    if df.empty:
+        codes = pd.Series([], dtype=str)
+        stock = np.empty(0, dtype=int)
+    else:
+        codes = df["Код"].astype(str)
+        codes = codes[codes.isin(offer_set)]
+        count = df.loc[codes.index, "Количество"].astype(str)
+        stock = (
+            pd.to_numeric(count.replace({">10": "100", "1": "0"}), errors="raise")
+            .astype(int)
+            .to_numpy()
+        )
+    stocks = [
+        {
+            "sku": code,
+            "warehouseId": warehouse_id,
+            "items": [
                 {
-                    "sku": str(watch.get("Код")),
-                    "warehouseId": warehouse_id,
-                    "items": [
-                        {
-                            "count": stock,
-                            "type": "FIT",
-                            "updatedAt": date,
-                        }
-                    ],
+                    "count": int(number),
+                    "type": "FIT",
+                    "updatedAt": date,
                 }
-            )
-            offer_ids.remove(str(watch.get("Код")))
-    # Добавим недостающее из загруженного:
-    for offer_id in offer_ids:
+            ],
+        }
+        for code, number in zip(codes, stock)
+    ]
+    not_empty = list(itertools.compress(stocks, stock != 0))
+    # Добавим недостающее из загруженного. Нулевые позиции одинаковы,
+    # поэтому items у них общий: структура дальше только сериализуется.
+    empty_items = [
+        {
+            "count": 0,
+            "type": "FIT",
+            "updatedAt": date,
+        }
+    ]
+    for offer_id in offer_set.difference(codes):
         stocks.append(
             {
                 "sku": offer_id,
                 "warehouseId": warehouse_id,
-                "items": [
-                    {
-                        "count": 0,
-                        "type": "FIT",
-                        "updatedAt": date,
-                    }
-                ],
+                "items": empty_items,
             }
         )
-    return stocks
+    return stocks, not_empty
 
 
 def create_prices(watch_remnants, offer_ids):
@@ -237,11 +296,13 @@ def create_prices(watch_remnants, offer_ids):
     
     Формирует структуру данных для API Яндекс.Маркета, преобразуя цены
     из формата поставщика в формат, требуемый маркетплейсом.
-    
+    Цены очищаются от лишних символов одним проходом по столбцу.
+
     Args:
-        watch_remnants (list): Список словарей с данными от поставщика.
+        watch_remnants (pandas.DataFrame | list): Данные от поставщика:
+            таблица или список словарей со столбцами 'Код' и 'Цена'.
         offer_ids (list): Список артикулов товаров, размещенных на Яндекс.Маркете.
-    
+
     Returns:
         list: Список словарей в формате API Яндекс.Маркета для обновления цен.
     
@@ -254,92 +315,175 @@ def create_prices(watch_remnants, offer_ids):
         >>> create_prices([{'Код': '999', 'Цена': "1'000 руб."}], ['123'])
         []
     """
-    prices = []
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            price = {
-                "id": str(watch.get("Код")),
-                # "feed": {"id": 0},
-                "price": {
-                    "value": int(price_conversion(watch.get("Цена"))),
-                    # "discountBase": 0,
-                    "currencyId": "RUR",
-                    # "vat": 0,
-                },
-                # "marketSku": 0,
-                # "shopSku": "string",
-            }
-            prices.append(price)
+    offer_set = set(offer_ids)
+    df = (
+        watch_remnants
+        if isinstance(watch_remnants, pd.DataFrame)
+        else pd.DataFrame(watch_remnants)
+    )
+    if df.empty:
+        return []
+    codes = df["Код"].astype(str)
+    codes = codes[codes.isin(offer_set)]
+    price = (
+        df.loc[codes.index, "Цена"]
+        .astype(str)
+        .str.split(".", n=1)
+        .str[0]
+        .str.replace(_DIGITS_RE, "", regex=True)
+    )
+    prices = [
+        {
+            "id": code,
+            # "feed": {"id": 0},
+            "price": {
+                "value": int(value),
+                # "discountBase": 0,
+                "currencyId": "RUR",
+                # "vat": 0,
+            },
+            # "marketSku": 0,
+            # "shopSku": "string",
+        }
+        for code, value in zip(codes, price)
+    ]
     return prices
 
 
-async def upload_prices(watch_remnants, campaign_id, market_token):
+async def upload_prices(
+    watch_remnants, campaign_id, market_token, session=None, offer_ids=None
+):
     """Асинхронно обновляет цены товаров на Яндекс.Маркете.
-    
+
     Получает список товаров кампании, формирует данные для обновления цен
-    и отправляет их партиями через API Яндекс.Маркета.
-    
+    и отправляет их партиями через API Яндекс.Маркета. Партии уходят
+    конкурентно, не более восьми запросов одновременно, чтобы не упереться
+    в ограничение частоты запросов API.
+
     Args:
         watch_remnants (list): Список словарей с данными от поставщика.
         campaign_id (str): Идентификатор кампании (кабинета продавца).
         market_token (str): Токен доступа к API Яндекс.Маркета.
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+        offer_ids (list, optional): Готовый список артикулов кампании.
+            Если не передан, запрашивается у API.
+
     Returns:
         list: Список всех сформированных данных о ценах.
-    
+
     Examples:
         >>> import asyncio
         >>> watch_data = [{'Код': '123', 'Цена': "5'990.00 руб."}]
         >>> asyncio.run(upload_prices(watch_data, "campaign123", "token123"))
         [{'id': '123', 'price': {'value': 5990, 'currencyId': 'RUR'}}]
     """
-    offer_ids = get_offer_ids(campaign_id, market_token)
+    if session is None:
+        async with make_session() as session:
+            return await upload_prices(
+                watch_remnants, campaign_id, market_token, session, offer_ids
+            )
+    if offer_ids is None:
+        offer_ids = await get_offer_ids(campaign_id, market_token, session)
     prices = create_prices(watch_remnants, offer_ids)
-    for some_prices in list(divide(prices, 500)):
-        update_price(some_prices, campaign_id, market_token)
+    semaphore = asyncio.Semaphore(8)
+
+    async def upload_batch(some_prices):
+        async with semaphore:
+            try:
+                return await update_price(
+                    some_prices, campaign_id, market_token, session
+                )
+            except aiohttp.ClientResponseError as error:
+                # 429 и 5xx уже повторены в request_with_retry, поэтому
+                # сюда доходят только ошибки клиента: пропускаем одну
+                # партию, не отменяя остальные.
+                logger.error(
+                    "Партия цен отклонена: %s %s", error.status, error.message
+                )
+
+    await asyncio.gather(
+        *(
+            upload_batch(some_prices)
+            for some_prices in divide(prices, YANDEX_PRICES_BATCH)
+        )
+    )
     return prices
 
 
-async def upload_stocks(watch_remnants, campaign_id, market_token, warehouse_id):
+async def upload_stocks(
+    watch_remnants, campaign_id, market_token, warehouse_id, session=None,
+    offer_ids=None,
+):
     """Асинхронно обновляет остатки товаров на Яндекс.Маркете.
-    
+
     Получает список товаров кампании, формирует данные об остатках
-    и отправляет их партиями через API Яндекс.Маркета.
-    
+    и отправляет их партиями через API Яндекс.Маркета. Партии уходят
+    конкурентно, не более восьми запросов одновременно, чтобы не упереться
+    в ограничение частоты запросов API.
+
     Args:
         watch_remnants (list): Список словарей с данными от поставщика.
         campaign_id (str): Идентификатор кампании (кабинета продавца).
         market_token (str): Токен доступа к API Яндекс.Маркета.
         warehouse_id (str): Идентификатор склада (FBS или DBS).
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+        offer_ids (list, optional): Готовый список артикулов кампании.
+            Если не передан, запрашивается у API.
+
     Returns:
         tuple: Кортеж из двух списков:
             - not_empty: товары с ненулевым остатком
             - stocks: все товары с остатками
-    
+
     Examples:
         >>> import asyncio
         >>> watch_data = [{'Код': '123', 'Количество': '5'}]
         >>> asyncio.run(upload_stocks(watch_data, "campaign123", "token123", "warehouse123"))
         ([{'sku': '123', ...}], [{'sku': '123', ...}])
     """
-    offer_ids = get_offer_ids(campaign_id, market_token)
-    stocks = create_stocks(watch_remnants, offer_ids, warehouse_id)
-    for some_stock in list(divide(stocks, 2000)):
-        update_stocks(some_stock, campaign_id, market_token)
-    not_empty = list(
-        filter(lambda stock: (stock.get("items")[0].get("count") != 0), stocks)
+    if session is None:
+        async with make_session() as session:
+            return await upload_stocks(
+                watch_remnants, campaign_id, market_token, warehouse_id, session,
+                offer_ids,
+            )
+    if offer_ids is None:
+        offer_ids = await get_offer_ids(campaign_id, market_token, session)
+    stocks, not_empty = create_stocks(watch_remnants, offer_ids, warehouse_id)
+    semaphore = asyncio.Semaphore(8)
+
+    async def upload_batch(some_stock):
+        async with semaphore:
+            try:
+                return await update_stocks(
+                    some_stock, campaign_id, market_token, session
+                )
+            except aiohttp.ClientResponseError as error:
+                # 429 и 5xx уже повторены в request_with_retry, поэтому
+                # сюда доходят только ошибки клиента: пропускаем одну
+                # партию, не отменяя остальные.
+                logger.error(
+                    "Партия остатков отклонена: %s %s", error.status, error.message
+                )
+
+    await asyncio.gather(
+        *(
+            upload_batch(some_stock)
+            for some_stock in divide(stocks, YANDEX_STOCKS_BATCH)
+        )
     )
     return not_empty, stocks
 
 
-def main():
+async def main():
     """Основная функция для запуска скрипта вручную.
-    
+
     Читает настройки из переменных окружения, загружает данные
     от поставщика и обновляет остатки и цены на Яндекс.Маркете
-    отдельно для кампаний FBS и DBS.
-    
+    отдельно для кампаний FBS и DBS. Обновления остатков и цен
+    обеих кампаний независимы, поэтому выполняются конкурентно
+    через одну общую HTTP-сессию.
+
     Examples:
         Для запуска требуется задать переменные окружения:
         export MARKET_TOKEN="your_token"
@@ -358,30 +502,59 @@ def main():
 
     watch_remnants = download_stock()
     try:
-        # FBS
-        offer_ids = get_offer_ids(campaign_fbs_id, market_token)
-        # Обновить остатки FBS
-        stocks = create_stocks(watch_remnants, offer_ids, warehouse_fbs_id)
-        for some_stock in list(divide(stocks, 2000)):
-            update_stocks(some_stock, campaign_fbs_id, market_token)
-        # Поменять цены FBS
-        upload_prices(watch_remnants, campaign_fbs_id, market_token)
-
-        # DBS
-        offer_ids = get_offer_ids(campaign_dbs_id, market_token)
-        # Обновить остатки DBS
-        stocks = create_stocks(watch_remnants, offer_ids, warehouse_dbs_id)
-        for some_stock in list(divide(stocks, 2000)):
-            update_stocks(some_stock, campaign_dbs_id, market_token)
-        # Поменять цены DBS
-        upload_prices(watch_remnants, campaign_dbs_id, market_token)
-    except requests.exceptions.ReadTimeout:
-        print("Превышено время ожидания...")
-    except requests.exceptions.ConnectionError as error:
-        print(error, "Ошибка соединения")
-    except Exception as error:
-        print(error, "ERROR_2")
+        async with make_session() as session:
+            offer_ids_fbs, offer_ids_dbs = await asyncio.gather(
+                get_offer_ids(campaign_fbs_id, market_token, session),
+                get_offer_ids(campaign_dbs_id, market_token, session),
+            )
+            # Сбой одного конвейера не отменяет остальные три
+            results = await asyncio.gather(
+                # Обновить остатки и цены FBS
+                upload_stocks(
+                    watch_remnants,
+                    campaign_fbs_id,
+                    market_token,
+                    warehouse_fbs_id,
+                    session,
+                    offer_ids_fbs,
+                ),
+                upload_prices(
+                    watch_remnants,
+                    campaign_fbs_id,
+                    market_token,
+                    session,
+                    offer_ids_fbs,
+                ),
+                # Обновить остатки и цены DBS
+                upload_stocks(
+                    watch_remnants,
+                    campaign_dbs_id,
+                    market_token,
+                    warehouse_dbs_id,
+                    session,
+                    offer_ids_dbs,
+                ),
+                upload_prices(
+                    watch_remnants,
+                    campaign_dbs_id,
+                    market_token,
+                    session,
+                    offer_ids_dbs,
+                ),
+                return_exceptions=True,
+            )
+            names = ("остатки FBS", "цены FBS", "остатки DBS", "цены DBS")
+            for name, result in zip(names, results):
+                if isinstance(result, BaseException):
+                    logger.error("Не удалось обновить %s: %s", name, result)
+    except aiohttp.ClientResponseError as error:
+        # 429 и 5xx уже повторены в request_with_retry
+        logger.error("API вернуло ошибку %s: %s", error.status, error.message)
+    except (aiohttp.ClientConnectionError, requests.exceptions.ConnectionError) as error:
+        logger.error("Ошибка соединения: %s", error)
+    except (asyncio.TimeoutError, requests.exceptions.Timeout):
+        logger.error("Превышено время ожидания ответа")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,39 +1,170 @@
+import asyncio
+import datetime
+import email.utils
 import io
+import itertools
+import json
 import logging.config
 import os
 import re
+import shutil
 import zipfile
 from environs import Env
 
+import aiohttp
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter, Retry
 
 logger = logging.getLogger(__file__)
 
+# Быстрый Rust-парсер Excel, если установлен python-calamine
+try:
+    import python_calamine  # noqa: F401
 
-def get_product_list(last_id, client_id, seller_token):
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
+# Быстрая сериализация JSON, если установлен orjson
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+_DIGITS_RE = re.compile("[^0-9]")
+
+# Максимальные размеры партий по документации Ozon Seller API
+OZON_STOCKS_BATCH = 100
+OZON_PRICES_BATCH = 1000
+
+# Локальный кэш разобранного файла остатков и HTTP-валидаторов ответа
+STOCK_CACHE_FILE = "ostatki.cache.pkl"
+STOCK_CACHE_META_FILE = "ostatki.cache.json"
+
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=20,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            respect_retry_after_header=True,
+            allowed_methods=["GET", "POST", "PUT"],
+        ),
+    ),
+)
+
+
+def make_session():
+    """Создает aiohttp-сессию с общим пулом соединений.
+
+    Соединения с API маркетплейсов переиспользуются между запросами,
+    поэтому TCP- и TLS-рукопожатия выполняются один раз на хост,
+    а не на каждый запрос. Тела запросов сериализуются через orjson,
+    если он установлен.
+
+    Returns:
+        aiohttp.ClientSession: Сессия с настроенным пулом соединений.
+
+    Examples:
+        >>> async with make_session() as session:
+        ...     ids = await get_offer_ids("client123", "token123", session)
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=60),
+        json_serialize=_json_dumps,
+    )
+
+
+def _retry_delay(retry_after, attempt):
+    """Считает паузу перед повтором по заголовку Retry-After.
+
+    Заголовок может содержать число секунд или HTTP-дату (RFC 9110);
+    если его нет или он не разбирается, используется экспоненциальная
+    пауза по номеру попытки.
+    """
+    backoff = 0.5 * 2**attempt
+    if not retry_after:
+        return backoff
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return max((retry_at - now).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return backoff
+
+
+async def request_with_retry(session, method, url, **kwargs):
+    """Выполняет HTTP-запрос с повторами при 429 и ошибках сервера.
+
+    При ответе 429 Too Many Requests или 5xx запрос повторяется
+    до пяти раз с экспоненциально растущей паузой; если сервер
+    прислал заголовок Retry-After, выдерживается указанное в нем
+    время. Остальные ошибки поднимаются сразу.
+
+    Args:
+        session (aiohttp.ClientSession): Сессия для выполнения запроса.
+        method (str): HTTP-метод: "GET", "POST" или "PUT".
+        url (str): Адрес запроса.
+        **kwargs: Дополнительные аргументы запроса (json, params, headers).
+
+    Returns:
+        dict: Разобранное JSON-тело успешного ответа.
+
+    Examples:
+        >>> asyncio.run(request_with_retry(session, "GET", url, params=payload))
+        {'result': {...}}
+    """
+    for attempt in range(5):
+        async with session.request(method, url, **kwargs) as response:
+            if response.status == 429 or response.status >= 500:
+                if attempt == 4:
+                    response.raise_for_status()
+                delay = _retry_delay(response.headers.get("Retry-After"), attempt)
+                await asyncio.sleep(delay)
+                continue
+            response.raise_for_status()
+            return await response.json()
+
+
+async def get_product_list(last_id, client_id, seller_token, session):
     """Получает список товаров магазина с маркетплейса Ozon.
-    
-    Выполняет запрос к API Ozon для получения товаров с пагинацией.
+
+    Выполняет асинхронный запрос к API Ozon для получения товаров с пагинацией.
     Возвращает все товары магазина, включая невидимые (со статусом ALL).
-    
+
     Args:
         last_id (str): Идентификатор последнего товара из предыдущего запроса.
             Для первого запроса передается пустая строка.
         client_id (str): ID клиента в системе Ozon.
         seller_token (str): Токен доступа к API продавца Ozon.
-    
+        session (aiohttp.ClientSession): Сессия для выполнения HTTP-запросов.
+
     Returns:
         dict: Словарь с результатами запроса, содержащий:
             - items: список товаров
             - last_id: идентификатор для следующего запроса
             - total: общее количество товаров
-    
+
     Examples:
-        >>> get_product_list("", "client123", "token123")
+        >>> asyncio.run(get_product_list("", "client123", "token123", session))
         {'items': [...], 'last_id': 'next123', 'total': 150}
-        
-        >>> get_product_list("next123", "client123", "token123")
+
+        >>> asyncio.run(get_product_list("next123", "client123", "token123", session))
         {'items': [...], 'last_id': '', 'total': 150}
     """
     url = "https://api-seller.ozon.ru/v2/product/list"
@@ -48,149 +179,211 @@ def get_product_list(last_id, client_id, seller_token):
         "last_id": last_id,
         "limit": 1000,
     }
-    response = requests.post(url, json=payload, headers=headers)
-    response.raise_for_status()
-    response_object = response.json()
+    response_object = await request_with_retry(
+        session, "POST", url, json=payload, headers=headers
+    )
     return response_object.get("result")
 
 
-def get_offer_ids(client_id, seller_token):
+_offer_ids_cache = {}
+
+
+async def get_offer_ids(client_id, seller_token, session=None):
     """Получает список всех артикулов товаров магазина на Ozon.
-    
+
     Использует пагинацию для получения полного списка товаров,
-    затем извлекает только их артикулы (offer_id).
-    
+    затем извлекает только их артикулы (offer_id). Пока обрабатывается
+    текущая страница, следующая уже запрашивается в фоне: API отдает
+    курсор last_id, поэтому страницы конвейеризуются с опережением в одну.
+    Результат запоминается на время работы процесса, поэтому повторные
+    вызовы с теми же client_id и seller_token не обходят пагинацию заново.
+
     Args:
         client_id (str): ID клиента в системе Ozon.
         seller_token (str): Токен доступа к API продавца Ozon.
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+            Если не передана, создается на время вызова.
+
     Returns:
         list: Список строковых артикулов (offer_id) всех товаров магазина.
-    
+
     Examples:
-        >>> get_offer_ids("client123", "token123")
+        >>> asyncio.run(get_offer_ids("client123", "token123"))
         ['12345', '67890', '11223']
-        
-        >>> get_offer_ids("invalid_client", "invalid_token")
+
+        >>> asyncio.run(get_offer_ids("invalid_client", "invalid_token"))
         Traceback (most recent call last):
-        requests.exceptions.HTTPError: 401 Client Error
+        aiohttp.ClientResponseError: 401 Client Error
     """
-    last_id = ""
+    cached = _offer_ids_cache.get((client_id, seller_token))
+    if cached is not None:
+        return list(cached)
+    if session is None:
+        async with make_session() as session:
+            return await get_offer_ids(client_id, seller_token, session)
     product_list = []
+    some_prod = await get_product_list("", client_id, seller_token, session)
     while True:
-        some_prod = get_product_list(last_id, client_id, seller_token)
-        product_list.extend(some_prod.get("items"))
+        items = some_prod.get("items")
         total = some_prod.get("total")
-        last_id = some_prod.get("last_id")
-        if total == len(product_list):
+        next_page = None
+        if len(product_list) + len(items) < total:
+            next_page = asyncio.create_task(
+                get_product_list(
+                    some_prod.get("last_id"), client_id, seller_token, session
+                )
+            )
+        product_list.extend(items)
+        if next_page is None:
             break
-    offer_ids = []
-    for product in product_list:
-        offer_ids.append(product.get("offer_id"))
+        some_prod = await next_page
+    offer_ids = [product.get("offer_id") for product in product_list]
+    _offer_ids_cache[(client_id, seller_token)] = tuple(offer_ids)
     return offer_ids
 
 
-def update_price(prices: list, client_id, seller_token):
+async def update_price(prices: list, client_id, seller_token, session=None):
     """Обновляет цены товаров на маркетплейсе Ozon.
-    
-    Отправляет запрос к API Ozon для обновления цен у указанных товаров.
-    
+
+    Отправляет асинхронный запрос к API Ozon для обновления цен
+    у указанных товаров.
+
     Args:
         prices (list): Список словарей с данными для обновления цен.
             Каждый словарь должен содержать ключи: offer_id, price, currency_code.
         client_id (str): ID клиента в системе Ozon.
         seller_token (str): Токен доступа к API продавца Ozon.
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+            Если не передана, создается на время вызова.
+
     Returns:
         dict: Ответ от API Ozon с результатом обновления цен.
-    
+
     Examples:
         >>> prices = [{'offer_id': '123', 'price': '5990', 'currency_code': 'RUB'}]
-        >>> update_price(prices, "client123", "token123")
+        >>> asyncio.run(update_price(prices, "client123", "token123"))
         {'result': [...]}
-        
-        >>> update_price([], "client123", "token123")
+
+        >>> asyncio.run(update_price([], "client123", "token123"))
         {'result': []}
     """
+    if session is None:
+        async with make_session() as session:
+            return await update_price(prices, client_id, seller_token, session)
     url = "https://api-seller.ozon.ru/v1/product/import/prices"
     headers = {
         "Client-Id": client_id,
         "Api-Key": seller_token,
     }
     payload = {"prices": prices}
-    response = requests.post(url, json=payload, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    return await request_with_retry(session, "POST", url, json=payload, headers=headers)
 
 
-def update_stocks(stocks: list, client_id, seller_token):
+async def update_stocks(stocks: list, client_id, seller_token, session=None):
     """Обновляет информацию об остатках товаров на Ozon.
-    
-    Отправляет запрос к API Ozon для обновления количества доступных товаров.
-    
+
+    Отправляет асинхронный запрос к API Ozon для обновления количества
+    доступных товаров.
+
     Args:
         stocks (list): Список словарей с данными об остатках.
             Каждый словарь должен содержать ключи: offer_id, stock.
         client_id (str): ID клиента в системе Ozon.
         seller_token (str): Токен доступа к API продавца Ozon.
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+            Если не передана, создается на время вызова.
+
     Returns:
         dict: Ответ от API Ozon с результатом обновления остатков.
-    
+
     Examples:
         >>> stocks = [{'offer_id': '123', 'stock': 10}]
-        >>> update_stocks(stocks, "client123", "token123")
+        >>> asyncio.run(update_stocks(stocks, "client123", "token123"))
         {'result': [...]}
-        
-        >>> update_stocks([{'offer_id': '123', 'stock': -1}], "client123", "token123")
+
+        >>> asyncio.run(update_stocks([{'offer_id': '123', 'stock': -1}], "client123", "token123"))
         Traceback (most recent call last):
-        requests.exceptions.HTTPError: 400 Client Error
+        aiohttp.ClientResponseError: 400 Client Error
     """
+    if session is None:
+        async with make_session() as session:
+            return await update_stocks(stocks, client_id, seller_token, session)
     url = "https://api-seller.ozon.ru/v1/product/import/stocks"
     headers = {
         "Client-Id": client_id,
         "Api-Key": seller_token,
     }
     payload = {"stocks": stocks}
-    response = requests.post(url, json=payload, headers=headers)
-    response.raise_for_status()
-    return response.json()
+    return await request_with_retry(session, "POST", url, json=payload, headers=headers)
 
 
 
 def download_stock():
     """Скачивает и обрабатывает файл с остатками товаров с сайта поставщика.
     
-    Загружает ZIP-архив с актуальными остатками часов Casio,
-    извлекает Excel-файл и преобразует его в список словарей.
-    
+    Загружает ZIP-архив с актуальными остатками часов Casio
+    и читает Excel-файл прямо из архива в памяти, не сохраняя
+    его на диск. Если установлен python-calamine, разбор файла
+    выполняется его быстрым парсером.
+
+    Если в файле поставщика один артикул встречается несколько раз
+    (например, из-за разбивки по складам), остается последняя строка,
+    чтобы не отправлять на маркетплейсы дублирующиеся позиции.
+
+    Разобранная таблица сохраняется в локальный кэш вместе
+    с валидаторами ETag и Last-Modified ответа. При следующем
+    запуске выполняется условный запрос, и если файл поставщика
+    не менялся (ответ 304), таблица читается из кэша без скачивания
+    и разбора архива.
+
     Returns:
-        list: Список словарей с информацией о товарах.
-            Каждый словарь содержит ключи: 'Код', 'Количество', 'Цена'.
-    
+        pandas.DataFrame: Таблица с информацией о товарах.
+            Содержит столбцы: 'Код', 'Количество', 'Цена'.
+
     Examples:
         >>> download_stock()
-        [{'Код': '12345', 'Количество': '>10', 'Цена': "5'990.00 руб."}, ...]
-        
+              Код Количество           Цена
+        0   12345        >10  5'990.00 руб.
+        ...
+
         Если сайт поставщика недоступен:
         >>> download_stock()
         Traceback (most recent call last):
         requests.exceptions.ConnectionError
     """
     casio_url = "https://timeworld.ru/upload/files/ostatki.zip"
-    session = requests.Session()
-    response = session.get(casio_url)
-    response.raise_for_status()
-    with response, zipfile.ZipFile(io.BytesIO(response.content)) as archive:
-        archive.extractall(".")
-    excel_file = "ostatki.xls"
-    watch_remnants = pd.read_excel(
-        io=excel_file,
-        na_values=None,
-        keep_default_na=False,
-        header=17,
-    ).to_dict(orient="records")
-    os.remove("./ostatki.xls") 
+    headers = {}
+    if os.path.exists(STOCK_CACHE_META_FILE) and os.path.exists(STOCK_CACHE_FILE):
+        with open(STOCK_CACHE_META_FILE) as meta_file:
+            meta = json.load(meta_file)
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    buffer = io.BytesIO()
+    with SESSION.get(casio_url, stream=True, headers=headers) as response:
+        if response.status_code == 304:
+            return pd.read_pickle(STOCK_CACHE_FILE)
+        response.raise_for_status()
+        # Иначе при Content-Encoding в буфер попадет сжатый поток
+        response.raw.decode_content = True
+        shutil.copyfileobj(response.raw, buffer)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as archive:
+        with archive.open("ostatki.xls") as excel_file:
+            watch_remnants = pd.read_excel(
+                io=excel_file,
+                na_values=None,
+                keep_default_na=False,
+                header=17,
+                engine=EXCEL_ENGINE,
+            )
+    watch_remnants = watch_remnants.drop_duplicates(subset=["Код"], keep="last")
+    watch_remnants.to_pickle(STOCK_CACHE_FILE)
+    with open(STOCK_CACHE_META_FILE, "w") as meta_file:
+        json.dump({"etag": etag, "last_modified": last_modified}, meta_file)
     return watch_remnants
 
 
@@ -199,38 +392,54 @@ def create_stocks(watch_remnants, offer_ids):
     
     Формирует структуру данных для API Ozon, сопоставляя товары
     из файла поставщика с товарами, уже размещенными на маркетплейсе.
-    
+    Остатки считаются векторно по столбцам таблицы, без обхода строк
+    в цикле Python. Позиции с ненулевым остатком собираются тем же
+    проходом, без повторной фильтрации готового списка.
+
     Args:
-        watch_remnants (list): Список словарей с данными от поставщика.
+        watch_remnants (pandas.DataFrame | list): Данные от поставщика:
+            таблица или список словарей со столбцами 'Код' и 'Количество'.
         offer_ids (list): Список артикулов товаров, размещенных на Ozon.
-    
+
     Returns:
-        list: Список словарей в формате API Ozon для обновления остатков.
-    
+        tuple: Кортеж из двух списков в формате API Ozon:
+            - stocks: все товары с остатками
+            - not_empty: только товары с ненулевым остатком
+
     Examples:
         >>> watch_data = [{'Код': '123', 'Количество': '5'}]
         >>> offer_ids = ['123', '456']
         >>> create_stocks(watch_data, offer_ids)
-        [{'offer_id': '123', 'stock': 5}, {'offer_id': '456', 'stock': 0}]
-        
+        ([{'offer_id': '123', 'stock': 5}, {'offer_id': '456', 'stock': 0}],
+         [{'offer_id': '123', 'stock': 5}])
+
         >>> create_stocks([], ['123'])
-        [{'offer_id': '123', 'stock': 0}]
+        ([{'offer_id': '123', 'stock': 0}], [])
     """
-    stocks = []
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            count = str(watch.get("Количество"))
-            if count == ">10":
-                stock = 100
-            elif count == "1":
-                stock = 0
-            else:
-                stock = int(watch.get("Количество"))
-            stocks.append({"offer_id": str(watch.get("Код")), "stock": stock})
-            offer_ids.remove(str(watch.get("Код")))
-    for offer_id in offer_ids:
+    offer_set = set(offer_ids)
+    df = (
+        watch_remnants
+        if isinstance(watch_remnants, pd.DataFrame)
+        else pd.DataFrame(watch_remnants)
+    )
+    if df.empty:
+        return [{"offer_id": offer_id, "stock": 0} for offer_id in offer_set], []
+    codes = df["Код"].astype(str)
+    codes = codes[codes.isin(offer_set)]
+    count = df.loc[codes.index, "Количество"].astype(str)
+    stock = (
+        pd.to_numeric(count.replace({">10": "100", "1": "0"}), errors="raise")
+        .astype(int)
+        .to_numpy()
+    )
+    stocks = [
+        {"offer_id": code, "stock": int(number)}
+        for code, number in zip(codes, stock)
+    ]
+    not_empty = list(itertools.compress(stocks, stock != 0))
+    for offer_id in offer_set.difference(codes):
         stocks.append({"offer_id": offer_id, "stock": 0})
-    return stocks
+    return stocks, not_empty
 
 
 
@@ -239,34 +448,52 @@ def create_prices(watch_remnants, offer_ids):
     
     Формирует структуру данных для API Ozon, преобразуя цены
     из формата поставщика в формат, требуемый маркетплейсом.
-    
+    Цены очищаются от лишних символов одним проходом по столбцу.
+
     Args:
-        watch_remnants (list): Список словарей с данными от поставщика.
+        watch_remnants (pandas.DataFrame | list): Данные от поставщика:
+            таблица или список словарей со столбцами 'Код' и 'Цена'.
         offer_ids (list): Список артикулов товаров, размещенных на Ozon.
-    
+
     Returns:
         list: Список словарей в формате API Ozon для обновления цен.
-    
+
     Examples:
         >>> watch_data = [{'Код': '123', 'Цена': "5'990.00 руб."}]
         >>> offer_ids = ['123']
         >>> create_prices(watch_data, offer_ids)
         [{'offer_id': '123', 'price': '5990', 'currency_code': 'RUB', ...}]
-        
+
         >>> create_prices([{'Код': '999', 'Цена': "1'000 руб."}], ['123'])
         []
     """
-    prices = []
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            price = {
-                "auto_action_enabled": "UNKNOWN",
-                "currency_code": "RUB",
-                "offer_id": str(watch.get("Код")),
-                "old_price": "0",
-                "price": price_conversion(watch.get("Цена")),
-            }
-            prices.append(price)
+    offer_set = set(offer_ids)
+    df = (
+        watch_remnants
+        if isinstance(watch_remnants, pd.DataFrame)
+        else pd.DataFrame(watch_remnants)
+    )
+    if df.empty:
+        return []
+    codes = df["Код"].astype(str)
+    codes = codes[codes.isin(offer_set)]
+    price = (
+        df.loc[codes.index, "Цена"]
+        .astype(str)
+        .str.split(".", n=1)
+        .str[0]
+        .str.replace(_DIGITS_RE, "", regex=True)
+    )
+    prices = [
+        {
+            "auto_action_enabled": "UNKNOWN",
+            "currency_code": "RUB",
+            "offer_id": code,
+            "old_price": "0",
+            "price": value,
+        }
+        for code, value in zip(codes, price)
+    ]
     return prices
 
 
@@ -306,7 +533,7 @@ def price_conversion(price: str) -> str:
         Функция не проверяет корректность формата цены на входе.
         При передаче нечисловых данных возвращается пустая строка.
     """
-    return re.sub("[^0-9]", "", price.split(".")[0])
+    return _DIGITS_RE.sub("", price.split(".", 1)[0])
 
 
 def divide(lst: list, n: int):
@@ -317,7 +544,7 @@ def divide(lst: list, n: int):
     товаров при работе с API маркетплейсов.
     
     Args:
-        lst (list): Исходный список для разделения.
+        lst (list): Исходная последовательность для разделения.
         n (int): Максимальный размер каждой части.
     
     Yields:
@@ -333,74 +560,131 @@ def divide(lst: list, n: int):
         >>> list(divide([1, 2, 3], 5))
         [[1, 2, 3]]
     """
-    for i in range(0, len(lst), n):
-        yield lst[i : i + n]
+    iterator = iter(lst)
+    while chunk := list(itertools.islice(iterator, n)):
+        yield chunk
 
 
-async def upload_prices(watch_remnants, client_id, seller_token):
+async def upload_prices(
+    watch_remnants, client_id, seller_token, session=None, offer_ids=None
+):
     """Асинхронно обновляет цены всех товаров на Ozon.
-    
+
     Получает список товаров, формирует данные для обновления цен
-    и отправляет их партиями через API Ozon.
-    
+    и отправляет их партиями через API Ozon. Партии уходят конкурентно,
+    не более восьми запросов одновременно, чтобы не упереться
+    в ограничение частоты запросов API.
+
     Args:
         watch_remnants (list): Список словарей с данными от поставщика.
         client_id (str): ID клиента в системе Ozon.
         seller_token (str): Токен доступа к API продавца Ozon.
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+        offer_ids (list, optional): Готовый список артикулов магазина.
+            Если не передан, запрашивается у API.
+
     Returns:
         list: Список всех сформированных данных о ценах.
-    
+
     Examples:
         >>> import asyncio
         >>> watch_data = [{'Код': '123', 'Цена': "5'990.00 руб."}]
         >>> asyncio.run(upload_prices(watch_data, "client123", "token123"))
         [{'offer_id': '123', 'price': '5990', ...}]
     """
-    offer_ids = get_offer_ids(client_id, seller_token)
+    if session is None:
+        async with make_session() as session:
+            return await upload_prices(
+                watch_remnants, client_id, seller_token, session, offer_ids
+            )
+    if offer_ids is None:
+        offer_ids = await get_offer_ids(client_id, seller_token, session)
     prices = create_prices(watch_remnants, offer_ids)
-    for some_price in list(divide(prices, 1000)):
-        update_price(some_price, client_id, seller_token)
+    semaphore = asyncio.Semaphore(8)
+
+    async def upload_batch(some_price):
+        async with semaphore:
+            try:
+                return await update_price(some_price, client_id, seller_token, session)
+            except aiohttp.ClientResponseError as error:
+                # 429 и 5xx уже повторены в request_with_retry, поэтому
+                # сюда доходят только ошибки клиента: пропускаем одну
+                # партию, не отменяя остальные.
+                logger.error(
+                    "Партия цен отклонена: %s %s", error.status, error.message
+                )
+
+    await asyncio.gather(
+        *(upload_batch(some_price) for some_price in divide(prices, OZON_PRICES_BATCH))
+    )
     return prices
- 
 
-async def upload_stocks(watch_remnants, client_id, seller_token):
+
+async def upload_stocks(
+    watch_remnants, client_id, seller_token, session=None, offer_ids=None
+):
     """Асинхронно обновляет остатки всех товаров на Ozon.
-    
+
     Получает список товаров, формирует данные об остатках
-    и отправляет их партиями через API Ozon.
-    
+    и отправляет их партиями через API Ozon. Партии уходят конкурентно,
+    не более восьми запросов одновременно, чтобы не упереться
+    в ограничение частоты запросов API.
+
     Args:
         watch_remnants (list): Список словарей с данными от поставщика.
         client_id (str): ID клиента в системе Ozon.
         seller_token (str): Токен доступа к API продавца Ozon.
-    
+        session (aiohttp.ClientSession, optional): Сессия для HTTP-запросов.
+        offer_ids (list, optional): Готовый список артикулов магазина.
+            Если не передан, запрашивается у API.
+
     Returns:
         tuple: Кортеж из двух списков:
             - not_empty: товары с ненулевым остатком
             - all_stocks: все товары с остатками
-    
+
     Examples:
         >>> import asyncio
         >>> watch_data = [{'Код': '123', 'Количество': '5'}]
         >>> asyncio.run(upload_stocks(watch_data, "client123", "token123"))
         ([{'offer_id': '123', 'stock': 5}], [{'offer_id': '123', 'stock': 5}])
     """
-    offer_ids = get_offer_ids(client_id, seller_token)
-    stocks = create_stocks(watch_remnants, offer_ids)
-    for some_stock in list(divide(stocks, 100)):
-        update_stocks(some_stock, client_id, seller_token)
-    not_empty = list(filter(lambda stock: (stock.get("stock") != 0), stocks))
-    return not_empty, stocks
+    if session is None:
+        async with make_session() as session:
+            return await upload_stocks(
+                watch_remnants, client_id, seller_token, session, offer_ids
+            )
+    if offer_ids is None:
+        offer_ids = await get_offer_ids(client_id, seller_token, session)
+    stocks, not_empty = create_stocks(watch_remnants, offer_ids)
+    semaphore = asyncio.Semaphore(8)
+
+    async def upload_batch(some_stock):
+        async with semaphore:
+            try:
+                return await update_stocks(some_stock, client_id, seller_token, session)
+            except aiohttp.ClientResponseError as error:
+                # 429 и 5xx уже повторены в request_with_retry, поэтому
+                # сюда доходят только ошибки клиента: пропускаем одну
+                # партию, не отменяя остальные.
+                logger.error(
+                    "Партия остатков отклонена: %s %s", error.status, error.message
+                )
 
+    await asyncio.gather(
+        *(upload_batch(some_stock) for some_stock in divide(stocks, OZON_STOCKS_BATCH))
+    )
+    return not_empty, stocks
 
 
-def main():
+async def main():
     """Основная функция для запуска скрипта вручную.
-    
+
     Читает настройки из переменных окружения, загружает данные
     от поставщика и обновляет остатки и цены на маркетплейсе Ozon.
-    
+    Обновления остатков и цен независимы, поэтому выполняются
+    конкурентно через одну общую HTTP-сессию.
+
     Examples:
         Для запуска требуется задать переменные окружения:
         export SELLER_TOKEN="your_token"
@@ -411,23 +695,33 @@ def main():
     seller_token = env.str("SELLER_TOKEN")
     client_id = env.str("CLIENT_ID")
     try:
-        offer_ids = get_offer_ids(client_id, seller_token)
-        watch_remnants = download_stock()
-        # Обновить остатки
-        stocks = create_stocks(watch_remnants, offer_ids)
-        for some_stock in list(divide(stocks, 100)):
-            update_stocks(some_stock, client_id, seller_token)
-        # Поменять цены
-        prices = create_prices(watch_remnants, offer_ids)
-        for some_price in list(divide(prices, 900)):
-            update_price(some_price, client_id, seller_token)
-    except requests.exceptions.ReadTimeout:
-        print("Превышено время ожидания...")
-    except requests.exceptions.ConnectionError as error:
-        print(error, "Ошибка соединения")
-    except Exception as error:
-        print(error, "ERROR_2")
+        async with make_session() as session:
+            offer_ids = await get_offer_ids(client_id, seller_token, session)
+            watch_remnants = download_stock()
+            # Обновить остатки и поменять цены; сбой одного конвейера
+            # не отменяет второй
+            results = await asyncio.gather(
+                upload_stocks(
+                    watch_remnants, client_id, seller_token, session, offer_ids
+                ),
+                upload_prices(
+                    watch_remnants, client_id, seller_token, session, offer_ids
+                ),
+                return_exceptions=True,
+            )
+            for name, result in zip(("остатки", "цены"), results):
+                if isinstance(result, BaseException):
+                    logger.error("Не удалось обновить %s: %s", name, result)
+    except aiohttp.ClientResponseError as error:
+        # 429 и 5xx уже повторены в request_with_retry
+        logger.error("API вернуло ошибку %s: %s", error.status, error.message)
+    except requests.exceptions.HTTPError as error:
+        logger.error("Не удалось скачать файл остатков: %s", error)
+    except (aiohttp.ClientConnectionError, requests.exceptions.ConnectionError) as error:
+        logger.error("Ошибка соединения: %s", error)
+    except (asyncio.TimeoutError, requests.exceptions.Timeout):
+        logger.error("Превышено время ожидания ответа")
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())